@@ -1,199 +1,260 @@
-import csv
-import networkx as nx
+import functools
+import io
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, hstack, identity
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+# Every founder can be matched this many times
+FOUNDER_CAPACITY = 2
 
 ############################################################################
 ### 1. LOADING DATA
 ############################################################################
 
-def load_mentor_data(mentor_csv):
+# Points for the 1st..5th pick
+_RANK_POINTS = np.array([5, 4, 3, 2, 1], dtype=np.int8)
+
+# Name, one column per pick, then the mentor capacity
+_N_COLUMNS = 2 + len(_RANK_POINTS)
+
+
+def read_rankings(ranking_csv):
     """
-    CSV columns (example):
-      0: Mentor Name
-      1..5: top picks
-      6: Mentor capacity (int)
+    Reads the name, pick and capacity columns (0..6) of a rankings sheet by
+    position, as strings, whatever the header row says. Short rows are
+    padded with "". Strips the name column.
+    ranking_csv can be a path, a file-like object or the raw file bytes.
+    A name listed twice keeps its last row.
     Returns:
-      mentor_prefs = {mentorName: {founderName: points, ...}}
-      mentor_caps  = {mentorName: capacity}
+      df, names
     """
-    rank_to_points = {0: 5, 1: 4, 2: 3, 3: 2, 4: 1}
-    mentor_prefs = {}
-    mentor_caps = {}
+    if isinstance(ranking_csv, bytes):
+        ranking_csv = io.BytesIO(ranking_csv)
+
+    df = pd.read_csv(ranking_csv, header=None, skiprows=1, names=range(_N_COLUMNS),
+                     index_col=False, encoding='utf-8-sig', dtype=str, keep_default_na=False)
+    names = df[0].str.strip()
+    keep = ~names.duplicated(keep='last')
+    return df[keep], names[keep]
+
 
-    with open(mentor_csv, mode='r', encoding='utf-8-sig') as f:
-        reader = csv.reader(f)
-        header = next(reader, None)  # skip header row
-        for row in reader:
-            if not row:
-                continue
-            mentor_name = row[0].strip()
-            picks = row[1:6]
-            capacity_str = row[6] if len(row) >= 7 else "1"
+def pick_table(df):
+    """
+    Columns 1..5 of a rankings sheet as an (n_rows, 5) array of stripped
+    names, "" = no pick.
+    """
+    cols = df.iloc[:, 1:1 + len(_RANK_POINTS)]
+    return cols.apply(lambda col: col.str.strip()).to_numpy(dtype=object)
 
-            try:
-                capacity = int(float(capacity_str.strip()))
-            except ValueError:
-                capacity = 1
 
-            prefs_dict = {}
-            for i, pick in enumerate(picks):
-                p = pick.strip()
-                if p:
-                    prefs_dict[p] = rank_to_points[i]
+def _file_cache(loader):
+    """
+    Memoizes a loader on its input file. Paths are keyed on their
+    (mtime, size) as well, so an edited file is read again; raw bytes are
+    keyed on their content; file-like objects are always read.
+    Cached results are shared between calls, so callers must not modify them.
+    """
+    @functools.lru_cache(maxsize=8)
+    def load_cached(source, stamp):
+        return loader(source)
 
-            mentor_prefs[mentor_name] = prefs_dict
-            mentor_caps[mentor_name] = capacity
+    @functools.wraps(loader)
+    def wrapper(source):
+        if isinstance(source, (str, os.PathLike)):
+            stat = os.stat(source)
+            return load_cached(source, (stat.st_mtime_ns, stat.st_size))
+        if isinstance(source, bytes):
+            return load_cached(source, None)
+        return loader(source)
 
-    return mentor_prefs, mentor_caps
+    wrapper.cache_clear = load_cached.cache_clear
+    return wrapper
 
 
-def load_founder_data(founder_csv):
+@_file_cache
+def load_mentor_data(mentor_csv):
     """
     CSV columns (example):
-      0: Founder Name
+      0: Mentor Name
       1..5: top picks
+      6: Mentor capacity (int)
     Returns:
-      founder_prefs = {founderName: {mentorName: points, ...}}
+      mentor_names = [mentorName, ...]
+      mentor_picks = (n_mentors, 5) array of founder names, "" = no pick
+      mentor_caps  = (n_mentors,) array of capacities
+    A mentor listed twice keeps their last row.
     """
-    rank_to_points = {0: 5, 1: 4, 2: 3, 3: 2, 4: 1}
-    founder_prefs = {}
+    df, names = read_rankings(mentor_csv)
 
-    with open(founder_csv, mode='r', encoding='utf-8-sig') as f:
-        reader = csv.reader(f)
-        header = next(reader, None)
-        for row in reader:
-            if not row:
-                continue
+    capacity = pd.to_numeric(df[6].str.strip(), errors='coerce')
+    mentor_caps = capacity.fillna(1).astype(int).to_numpy()
 
-            founder_name = row[0].strip()
-            picks = row[1:6]
+    return names.tolist(), pick_table(df), mentor_caps
 
-            prefs_dict = {}
-            for i, pick in enumerate(picks):
-                pick = pick.strip()
-                if pick:
-                    prefs_dict[pick] = rank_to_points[i]
 
-            founder_prefs[founder_name] = prefs_dict
+@_file_cache
+def load_founder_data(founder_csv):
+    """
+    CSV columns (example):
+      0: Founder Name
+      1..5: top picks
+    Returns:
+      founder_names = [founderName, ...]
+      founder_picks = (n_founders, 5) array of mentor names, "" = no pick
+    A founder listed twice keeps their last row.
+    """
+    df, names = read_rankings(founder_csv)
 
-    return founder_prefs
+    return names.tolist(), pick_table(df)
 
 ############################################################################
 ### 2. EXPAND (REPLICATE) MENTORS & FOUNDERS BY CAPACITY
 ############################################################################
 
-def expand_mentors_by_capacity(mentor_prefs, mentor_caps):
-    """
-    For each mentor M with capacity c, create c slots:
-       M_slot1..M_slotc
-    expanded_mentor_prefs[M_slot_i] = same preference dict as M
-    slot_to_mentor[M_slot_i] = M
-    """
-    expanded_mentor_prefs = {}
-    slot_to_mentor = {}
-
-    for mentor_name, capacity in mentor_caps.items():
-        for i in range(capacity):
-            slot_name = f"{mentor_name}_slot{i+1}"
-            expanded_mentor_prefs[slot_name] = mentor_prefs[mentor_name]
-            slot_to_mentor[slot_name] = mentor_name
-
-    return expanded_mentor_prefs, slot_to_mentor
-
-
-def expand_founders_by_capacity(founder_prefs, founder_caps):
+def expand_by_capacity(caps):
     """
-    For each founder F with capacity c, create c slots:
-       F_slot1..F_slotc
-    expanded_founder_prefs[F_slot_i] = same preference dict as F
-    slot_to_founder[F_slot_i] = F
+    For each entry i with capacity c, create c slots.
+    Returns:
+      slot_to_index[s] = i   (e.g. caps [2, 1, 3] -> [0, 0, 1, 2, 2, 2])
     """
-    expanded_founder_prefs = {}
-    slot_to_founder = {}
-
-    for founder_name, capacity in founder_caps.items():
-        for i in range(capacity):
-            slot_name = f"{founder_name}_slot{i+1}"
-            expanded_founder_prefs[slot_name] = founder_prefs[founder_name]
-            slot_to_founder[slot_name] = founder_name
-
-    return expanded_founder_prefs, slot_to_founder
+    caps = np.maximum(np.asarray(caps, dtype=np.int64), 0)
+    return np.repeat(np.arange(len(caps)), caps)
 
 ############################################################################
-### 3. BUILD A BIPARTITE GRAPH & RUN MAX-WEIGHT MATCHING
+### 3. BUILD THE WEIGHT MATRIX & RUN CAPACITATED MAX-WEIGHT MATCHING
 ############################################################################
 
-def build_bipartite_graph(expanded_mentor_prefs, slot_to_mentor,
-                          expanded_founder_prefs, slot_to_founder,
-                          overlap_bonus=2):
+def encode_picks(picks, pick_names):
     """
-    Creates a bipartite Graph:
-      - Left nodes = mentor slots
-      - Right nodes = founder slots
-      - Edge weight = (mentor_points + founder_points)
-                     + overlap_bonus if both sides > 0
+    Flattens an (n, 5) pick table into three parallel scatter arrays:
+      owner_ids[k], pick_ids[k], points[k]
+    owner_ids are rows of picks, pick_ids are positions in pick_names and
+    points come from the pick's column (1st pick = 5 points ... 5th = 1).
+    Blank picks and names not in pick_names (e.g. typos) are dropped.
     """
-    G = nx.Graph()
+    # Intern names to ids in one vectorized pass; unknown names get code -1
+    pick_ids = pd.Index(pick_names).get_indexer(picks.ravel()).reshape(picks.shape)
+    valid = (picks != "") & (pick_ids >= 0)
 
-    mentor_slots = list(expanded_mentor_prefs.keys())
-    founder_slots = list(expanded_founder_prefs.keys())
+    owner_ids = np.broadcast_to(np.arange(picks.shape[0])[:, None], picks.shape)
+    points = np.broadcast_to(_RANK_POINTS, picks.shape)
+    return owner_ids[valid], pick_ids[valid], points[valid]
 
-    G.add_nodes_from(mentor_slots, bipartite=0)
-    G.add_nodes_from(founder_slots, bipartite=1)
 
-    for ms in mentor_slots:
-        for fs in founder_slots:
-            mentor_name = slot_to_mentor[ms]
-            founder_name = slot_to_founder[fs]
+def build_weight_matrix(mentor_names, mentor_picks, founder_names, founder_picks,
+                        overlap_bonus=2):
+    """
+    Builds the weight matrix on the un-expanded mentors & founders:
+      - Rows = mentors (in mentor_names order)
+      - Columns = founders (in founder_names order)
+      - W[i, j] = (mentor_points + founder_points)
+                  + overlap_bonus if both sides > 0
+    Each side's picks are scattered into its points matrix in one write;
+    everything that nobody picked stays zero. If a row picks the same name
+    twice, the later (lower) pick wins.
+    Returns:
+      W, mentor_points, founder_points
+      (mentor_points[i, j] / founder_points[i, j] = each side's rank points
+       for the pair, so results can be reported without the pick tables)
+    """
+    m_src, f_dst, m_points = encode_picks(mentor_picks, founder_names)
+    f_src, m_dst, f_points = encode_picks(founder_picks, mentor_names)
 
-            mentor_points = expanded_mentor_prefs[ms].get(founder_name, 0)
-            founder_points = expanded_founder_prefs[fs].get(mentor_name, 0)
+    shape = (len(mentor_names), len(founder_names))
+    mentor_pts = np.zeros(shape, dtype=np.int8)
+    founder_pts = np.zeros(shape, dtype=np.int8)
+    mentor_pts[m_src, f_dst] = m_points
+    founder_pts[m_dst, f_src] = f_points
 
-            if mentor_points > 0 or founder_points > 0:
-                total = mentor_points + founder_points
-                if mentor_points > 0 and founder_points > 0:
-                    total += overlap_bonus
-                G.add_edge(ms, fs, weight=total)
+    # Rank points fit in int8; W gets int16 headroom for the overlap bonus
+    both_ranked = ((mentor_pts > 0) & (founder_pts > 0)).astype(np.int16)
+    W = mentor_pts.astype(np.int16) + founder_pts + overlap_bonus * both_ranked
 
-    return G
+    return W, mentor_pts, founder_pts
 
 
-def run_maximum_cardinality_max_weight(G):
+def run_capacitated_matching(W, mentor_caps, founder_caps):
     """
-    Return the edges from nx.max_weight_matching(G, maxcardinality=True).
-    Yields a set of frozensets({nodeA, nodeB}).
+    Maximum-cardinality, maximum-weight b-matching on the compact matrix W:
+    mentor i takes up to mentor_caps[i] founders and founder j up to
+    founder_caps[j] mentors. Only pairs with W > 0 count as edges.
+
+    Rows and columns are replicated by capacity (one per slot) in a sparse
+    matrix that holds only the edges, and the assignment is solved with
+    scipy's min_weight_full_bipartite_matching. Each mentor slot also gets
+    its own dummy column so a full matching always exists; a slot matched
+    to its dummy stays unmatched.
+    Every edge is given a bonus larger than any matching's total weight, so
+    the solver first maximizes the number of matched edges and then their
+    weight (the same objective as max_weight_matching(maxcardinality=True)).
+    Returns:
+      (mentor_idx, founder_idx) arrays, one entry per matched slot pair.
     """
-    return nx.max_weight_matching(G, maxcardinality=True)
+    # Mentors and founders without a single edge can never be matched, so
+    # leave them out of the solve and map the survivors back at the end.
+    active_m = np.flatnonzero(W.any(axis=1))
+    active_f = np.flatnonzero(W.any(axis=0))
+    W = W[np.ix_(active_m, active_f)]
+    slot_to_mentor = expand_by_capacity(np.asarray(mentor_caps)[active_m])
+    slot_to_founder = expand_by_capacity(np.asarray(founder_caps)[active_f])
+    n_mentor_slots, n_founder_slots = len(slot_to_mentor), len(slot_to_founder)
+
+    # Score the compact edges, then expand them to slots. W is stored as
+    # int16 and the bonus can exceed that range, so widen here.
+    max_edges = min(n_mentor_slots, n_founder_slots)
+    edge_bonus = int(W.max(initial=0)) * max_edges + 1
+    score = csr_matrix(W, dtype=np.int64)
+    score.data += edge_bonus
+    score = score[np.ix_(slot_to_mentor, slot_to_founder)]
+    if score.nnz == 0:
+        return active_m[:0], active_f[:0]
+
+    # Minimize cost = unmatched_cost - score; every cost stays positive and
+    # each unmatched slot pays the full unmatched_cost on its dummy column.
+    unmatched_cost = int(score.data.max()) + 1
+    score.data = unmatched_cost - score.data
+    dummies = identity(n_mentor_slots, dtype=np.int64, format='csr') * unmatched_cost
+    cost = hstack([score, dummies], format='csr')
+    rows, cols = min_weight_full_bipartite_matching(cost)
+
+    real = cols < n_founder_slots
+    return active_m[slot_to_mentor[rows[real]]], active_f[slot_to_founder[cols[real]]]
 
 ############################################################################
 ### 4. CHOICE LABEL HELPER
 ############################################################################
 
+_CHOICE_LABELS = ("Unranked", "Fifth Choice", "Fourth Choice",
+                  "Third Choice", "Second Choice", "First Choice")
+
+
 def choice_label(points):
     """
     Convert the 5-4-3-2-1 system into "First Choice", "Second Choice", etc.
     """
-    if points == 5:
-        return "First Choice"
-    elif points == 4:
-        return "Second Choice"
-    elif points == 3:
-        return "Third Choice"
-    elif points == 2:
-        return "Fourth Choice"
-    elif points == 1:
-        return "Fifth Choice"
-    else:
-        return "Unranked"
+    return _CHOICE_LABELS[points] if 0 <= points <= 5 else "Unranked"
 
 ############################################################################
 ### 5. THE FUNCTION STREAMLIT WILL CALL
 ############################################################################
 
-def run_matching(mentor_csv_path, founder_csv_path):
+# One block of the text output per match:
+#   (match_index, mentor, founder, mentor's choice, founder's choice, total points)
+_MATCH_TEMPLATE = ("Match {0}\n"
+                   "{1} <----> {2}\n"
+                   "- {1}'s {3} and {2}'s {4}\n"
+                   "- Total Points = {5}\n").format
+
+
+def run_matching(mentor_csv, founder_csv):
     """
     The function that Streamlit calls.
-    Reads the CSVs, runs the matching, and returns two items:
-      1) result_lines: multi-line text output for display.
+    Reads the CSVs (paths, file-like objects or raw bytes), runs the
+    matching, and returns two items:
+      1) result_text:  multi-line text output for display.
       2) pairs_data:   a list of dicts for CSV export with the columns:
              Mentor Name, Venture Name, Mentor's Choice,
              Venture's Choice, Total Points
@@ -201,108 +262,72 @@ def run_matching(mentor_csv_path, founder_csv_path):
     """
 
     # 1. Load data
-    mentor_prefs, mentor_caps = load_mentor_data(mentor_csv_path)
-    founder_prefs = load_founder_data(founder_csv_path)
+    mentor_names, mentor_picks, mentor_caps = load_mentor_data(mentor_csv)
+    founder_names, founder_picks = load_founder_data(founder_csv)
 
-    # 2. Suppose each founder can match 2 times
-    founder_caps = {f: 2 for f in founder_prefs}
-
-    # 3. Expand mentors & founders
-    expanded_mentor_prefs, slot_to_mentor = expand_mentors_by_capacity(mentor_prefs, mentor_caps)
-    expanded_founder_prefs, slot_to_founder = expand_founders_by_capacity(founder_prefs, founder_caps)
-
-    # 4. Build bipartite graph and match
+    # 2. Build the mentor x founder weight matrix and match with capacities
     overlap_bonus = 2
-    G = build_bipartite_graph(expanded_mentor_prefs, slot_to_mentor,
-                              expanded_founder_prefs, slot_to_founder,
-                              overlap_bonus=overlap_bonus)
-
-    matched_edges = run_maximum_cardinality_max_weight(G)
-
-    used_pairs = set()
-    total_weight = 0.0
-    result_lines = []
-    pairs_data = []  # for CSV export
-
-    match_index = 1
-
-    for edge in matched_edges:
-        nodeA, nodeB = list(edge)
-        # Determine which is mentor slot vs. founder slot
-        if nodeA in expanded_mentor_prefs:
-            ms, fs = nodeA, nodeB
-        else:
-            ms, fs = nodeB, nodeA
-
-        mentor_name = slot_to_mentor[ms]
-        founder_name = slot_to_founder[fs]
-
-        if (mentor_name, founder_name) in used_pairs:
-            continue
-        used_pairs.add((mentor_name, founder_name))
-
-        # Synergy (total points)
-        w = G[nodeA][nodeB]["weight"]
-        total_weight += w
-
-        # Retrieve rank points for each side
-        mentor_points = expanded_mentor_prefs[ms].get(founder_name, 0)
-        founder_points = expanded_founder_prefs[fs].get(mentor_name, 0)
-
-        # Build multi-line text output
-        heading = f"Match {match_index}"
-        line1 = f"{mentor_name} <----> {founder_name}"
-        line2 = f"- {mentor_name}'s {choice_label(mentor_points)} and {founder_name}'s {choice_label(founder_points)}"
-        line3 = f"- Total Points = {w}"
-
-        result_lines.append(heading)
-        result_lines.append(line1)
-        result_lines.append(line2)
-        result_lines.append(line3)
-        result_lines.append("")  # blank line for spacing
-
-        # Build CSV row (with extended text in columns C and D)
-        pairs_data.append({
-            "Mentor Name": mentor_name,
-            "Venture Name": founder_name,
-            "Mentor's Choice": f"{mentor_name}'s {choice_label(mentor_points)}",
-            "Venture's Choice": f"{founder_name}'s {choice_label(founder_points)}",
-            "Total Points": w
-        })
-
-        match_index += 1
+    W, mentor_pts, founder_pts = build_weight_matrix(mentor_names, mentor_picks,
+                                                     founder_names, founder_picks,
+                                                     overlap_bonus=overlap_bonus)
+
+    # Every founder gets FOUNDER_CAPACITY slots
+    mentor_idx, founder_idx = run_capacitated_matching(
+        W, mentor_caps, np.full(len(founder_names), FOUNDER_CAPACITY))
+
+    # 3. Deduplicate matched (mentor, founder) pairs (np.unique also sorts
+    #    them by mentor, then founder) and read weights & points by index
+    pairs = np.unique(np.column_stack((mentor_idx, founder_idx)), axis=0)
+    mentor_idx, founder_idx = pairs[:, 0], pairs[:, 1]
+    weights = W[mentor_idx, founder_idx]
+    total_weight = int(weights.sum(dtype=np.int64))
+
+    matches = list(zip(
+        [mentor_names[i] for i in mentor_idx.tolist()],
+        [founder_names[j] for j in founder_idx.tolist()],
+        [choice_label(p) for p in mentor_pts[mentor_idx, founder_idx].tolist()],
+        [choice_label(p) for p in founder_pts[mentor_idx, founder_idx].tolist()],
+        weights.tolist()))
+
+    # Multi-line text output (the template's trailing newline spaces the blocks)
+    result_lines = [_MATCH_TEMPLATE(k, mentor, founder, mentor_choice, founder_choice, w)
+                    for k, (mentor, founder, mentor_choice, founder_choice, w)
+                    in enumerate(matches, start=1)]
+
+    # CSV rows (with extended text in columns C and D)
+    pairs_data = [{
+        "Mentor Name": mentor,
+        "Venture Name": founder,
+        "Mentor's Choice": f"{mentor}'s {mentor_choice}",
+        "Venture's Choice": f"{founder}'s {founder_choice}",
+        "Total Points": w
+    } for mentor, founder, mentor_choice, founder_choice, w in matches]
 
     # Append summary lines to the multi-line output
-    result_lines.append(f"Number of unique mentor–founder pairs: {len(used_pairs)}")
+    result_lines.append(f"Number of unique mentor–founder pairs: {len(matches)}")
     result_lines.append(f"Total synergy across matched pairs: {total_weight}")
 
-    # Build match count summaries for mentors and founders
-    mentor_match_counts = {}
-    founder_match_counts = {}
-
-    for mentor, founder in used_pairs:
-        mentor_match_counts[mentor] = mentor_match_counts.get(mentor, 0) + 1
-        founder_match_counts[founder] = founder_match_counts.get(founder, 0) + 1
+    # Match count summaries for mentors and founders
+    mentor_counts = np.bincount(mentor_idx, minlength=len(mentor_names))
+    founder_counts = np.bincount(founder_idx, minlength=len(founder_names))
 
     result_lines.append("")
     result_lines.append("=== Mentor Matches ===")
-    for mentor, count in mentor_match_counts.items():
+    for i in np.flatnonzero(mentor_counts).tolist():
         # mentor_caps holds the capacity for each mentor
-        cap = mentor_caps.get(mentor, "?")
-        result_lines.append(f"{mentor}: {count}/{cap} matches")
+        result_lines.append(f"{mentor_names[i]}: {mentor_counts[i]}/{mentor_caps[i]} matches")
 
     result_lines.append("")
     result_lines.append("=== Founder Matches ===")
-    for founder, count in founder_match_counts.items():
-        # For founders we default to a capacity of 2
-        result_lines.append(f"{founder}: {count}/2 matches")
+    for j in np.flatnonzero(founder_counts).tolist():
+        # Every founder has the same capacity
+        result_lines.append(f"{founder_names[j]}: {founder_counts[j]}/{FOUNDER_CAPACITY} matches")
     result_lines.append("")
 
-    return result_lines, pairs_data
+    return "\n".join(result_lines), pairs_data
 
 
 if __name__ == "__main__":
     test_output, test_data = run_matching("Mentor Matching_Mentor Rankings-Grid view.csv",
                                           "Mentor Matching_Founder Rankings-Grid view.csv")
-    for line in test_output:
-        print(line)
+    print(test_output)
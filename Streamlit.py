@@ -1,40 +1,108 @@
+import multiprocessing
+
 import streamlit as st
 import pandas as pd  # We'll use pandas for CSV export
 import NEXT_Canada_Code   # Must match the .py file name exactly
 
-st.title("NEXT Canada Mentor Matching")
-
-mentor_csv_file = st.file_uploader("Upload Mentor Rankings CSV", type=["csv"])
-founder_csv_file = st.file_uploader("Upload Founder Rankings CSV", type=["csv"])
-
-pairs_data = None  # We'll store the matched pairs data for CSV export
-
-if mentor_csv_file and founder_csv_file:
-    if st.button("Get Results"):
-        import tempfile
-        # Save uploaded files as temporary CSV files
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp_mentor:
-            tmp_mentor.write(mentor_csv_file.read())
-            mentor_path = tmp_mentor.name
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp_founder:
-            tmp_founder.write(founder_csv_file.read())
-            founder_path = tmp_founder.name
-
-        # Run the matching function, which returns (result_lines, pairs_data)
-        result_lines, pairs_data = NEXT_Canada_Code.run_matching(mentor_path, founder_path)
-
-        st.write("**Results**")
-        for line in result_lines:
-            st.write(line)
-
-if pairs_data is not None:
-    # Display the download button once pairs_data is available
-    df = pd.DataFrame(pairs_data)
-    csv_str = df.to_csv(index=False)
-    st.download_button(
-        label="Download CSV",
-        data=csv_str,
-        file_name="mentor_matching_results.csv",
-        mime="text/csv"
-    )
+# Longest a single matching run may take before the session gives up on it
+MATCHING_TIMEOUT = 300  # seconds
+
+
+def matching_worker(conn, mentor_bytes, founder_bytes):
+    """
+    Worker process entry point: sends back run_matching's
+    (result_text, pairs_data), or the exception it raised.
+    """
+    try:
+        result = NEXT_Canada_Code.run_matching(mentor_bytes, founder_bytes)
+    except Exception as exc:
+        result = exc
+    conn.send(result)
+    conn.close()
+
+
+def run_matching_in_worker(mentor_bytes, founder_bytes):
+    """
+    Runs the matching in its own worker process, so it runs outside the
+    Streamlit server's interpreter (and its GIL) and never waits behind
+    another session's run. The worker is spawned rather than forked, since
+    forking the multithreaded server can deadlock.
+    Raises TimeoutError if the run takes longer than MATCHING_TIMEOUT and
+    ChildProcessError if the worker dies (e.g. killed for running out of
+    memory); either way the worker is gone when this returns.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    receiver, sender = ctx.Pipe(duplex=False)
+    # Bytes pickle cleanly to the worker
+    worker = ctx.Process(target=matching_worker, args=(sender, mentor_bytes, founder_bytes),
+                         daemon=True)
+    worker.start()
+    sender.close()
+    try:
+        if not receiver.poll(MATCHING_TIMEOUT):
+            raise TimeoutError(f"Matching took longer than {MATCHING_TIMEOUT} seconds")
+        try:
+            result = receiver.recv()
+        except EOFError:
+            # The worker exited without sending anything back
+            worker.join()
+            raise ChildProcessError(f"Matching worker exited with code {worker.exitcode}")
+    finally:
+        receiver.close()
+        worker.kill()
+        worker.join()
+
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+@st.cache_data(max_entries=8, ttl=3600, show_spinner=False)
+def run_matching_cached(mentor_bytes, founder_bytes):
+    """
+    Runs the matching on the uploaded file contents (no temp files needed).
+    Cached on those bytes, so reruns (e.g. clicking Download) with the same
+    uploads return instantly instead of matching again.
+    """
+    return run_matching_in_worker(mentor_bytes, founder_bytes)
+
+
+def main():
+    st.title("NEXT Canada Mentor Matching")
+
+    mentor_csv_file = st.file_uploader("Upload Mentor Rankings CSV", type=["csv"])
+    founder_csv_file = st.file_uploader("Upload Founder Rankings CSV", type=["csv"])
+
+    pairs_data = None  # We'll store the matched pairs data for CSV export
+
+    if mentor_csv_file and founder_csv_file:
+        if st.button("Get Results"):
+            # Run the matching function, which returns (result_text, pairs_data)
+            try:
+                with st.spinner("Matching mentors and founders..."):
+                    result_text, pairs_data = run_matching_cached(mentor_csv_file.getvalue(),
+                                                                  founder_csv_file.getvalue())
+            except TimeoutError:
+                st.error(f"Matching did not finish within {MATCHING_TIMEOUT} seconds.")
+            except ChildProcessError:
+                st.error("Matching stopped unexpectedly (the worker may have run out of memory).")
+            else:
+                st.write("**Results**")
+                st.text(result_text)
+
+    if pairs_data is not None:
+        # Display the download button once pairs_data is available
+        df = pd.DataFrame(pairs_data)
+        csv_str = df.to_csv(index=False)
+        st.download_button(
+            label="Download CSV",
+            data=csv_str,
+            file_name="mentor_matching_results.csv",
+            mime="text/csv"
+        )
+
+
+# Streamlit runs this script as __main__; the spawned matching worker
+# imports it as __mp_main__ and must not render the page.
+if __name__ == "__main__":
+    main()